@@ -1,9 +1,236 @@
 import yt_dlp
+import asyncio
+import inspect
 import subprocess
+import sys
 import os
-from datetime import datetime
+import re
+import json
+import time
+import threading
+import uuid
+import functools
+import atexit
+import queue
+import contextvars
+from collections import ChainMap, OrderedDict, deque
 import logging
-from typing import Optional
+import logging.handlers
+from typing import Awaitable, Callable, Optional, Tuple, Union
+
+# Receives the completed fraction (0.0 - 1.0); may be a coroutine function
+ProgressCallback = Callable[[float], Union[None, Awaitable[None]]]
+
+LOG_FILE = 'youtube_downloader.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# ID of the job whose segment is being downloaded in the current context
+_JOB_ID: contextvars.ContextVar = contextvars.ContextVar('job_id', default=None)
+
+# Seconds a cached video metadata entry (including its direct stream URL) stays valid.
+# YouTube stream URLs expire after a few hours, so keep this well below that.
+META_CACHE_TTL = 3600
+
+# Maximum number of videos kept in the in-process metadata cache
+META_CACHE_MAX_ENTRIES = 512
+
+# In-process LRU metadata cache: video ID -> (fetched_at, metadata)
+_META_CACHE: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+_META_CACHE_LOCK = threading.Lock()
+
+# yt-dlp options used for metadata extraction. Only title, duration and one
+# progressive stream are needed, so skip playlists, DASH/HLS manifests and
+# query only a couple of lightweight player clients.
+YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+    'extract_flat': 'in_playlist',
+    'extractor_args': {'youtube': {'player_client': ['ios', 'mweb']}},
+    'youtube_include_dash_manifest': False,
+    'youtube_include_hls_manifest': False,
+}
+
+# Redirect results ('_type': 'url') followed before giving up on extraction
+MAX_URL_REDIRECTS = 3
+
+# YoutubeDL instances are expensive to build (extractor registration) and
+# extract_info is not reentrant, so each thread keeps and reuses its own
+_YDL_LOCAL = threading.local()
+
+# Number of trailing FFmpeg error lines kept for error reporting
+FFMPEG_ERROR_LINES = 20
+
+# Seconds to wait for the rest of yt-dlp's stderr once it has exited
+SOURCE_STDERR_TIMEOUT = 1
+
+# Decoder/filter threads for FFmpeg; only matters once it has to re-encode
+FFMPEG_THREADS = max(1, os.cpu_count() or 2)
+
+STREAM_COPY_ARGS = ('-c', 'copy')
+AUDIO_REENCODE_ARGS = ('-c:v', 'copy', '-c:a', 'aac', '-b:a', '128k')
+REENCODE_ARGS = ('-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac', '-b:a', '128k', '-threads', '0')
+
+# Clips are written as MP4 unless a filename with another extension is given
+OUTPUT_EXT = 'mp4'
+
+# Codec families (the part of yt-dlp's codec string before the first '.')
+# that can be stream copied into an MP4 that plays back widely
+MP4_VIDEO_CODECS = frozenset({'avc1', 'hev1', 'hvc1', 'av01', 'vp09', 'vp9'})
+MP4_AUDIO_CODECS = frozenset({'mp4a'})
+
+# When re-encoding video, seconds before the start time that the fast input
+# seek lands on; the output-side seek then trims this pre-roll away for a
+# frame-accurate cut. Not used for video stream copy, where an output seek
+# would drop every packet up to the next keyframe.
+SEEK_PREROLL = 2
+
+# When there is no direct HTTP(S) stream FFmpeg can read, yt-dlp downloads
+# this format and pipes it into FFmpeg's stdin
+PIPE_FORMAT = 'best[ext=mp4]/best'
+PIPE_FORMAT_EXT = 'mp4'
+
+# Seconds per component for SS, MM:SS and HH:MM:SS timestamps
+_TIME_MULTIPLIERS = {1: (1,), 2: (60, 1), 3: (3600, 60, 1)}
+
+# The ID must end at a non-ID character so longer tokens are not truncated
+_VIDEO_ID_RE = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([0-9A-Za-z_-]{11})(?![0-9A-Za-z_-])')
+
+
+def _meta_cache_get(video_id: str, now: float) -> Optional[dict]:
+    """Return fresh cached metadata for a video, marking it recently used"""
+    with _META_CACHE_LOCK:
+        entry = _META_CACHE.get(video_id)
+        if entry is None:
+            return None
+        if now - entry[0] >= META_CACHE_TTL:
+            del _META_CACHE[video_id]
+            return None
+        _META_CACHE.move_to_end(video_id)
+        return entry[1]
+
+
+def _meta_cache_put(video_id: str, fetched_at: float, metadata: dict):
+    """Cache metadata for a video, dropping expired and least recently used entries"""
+    with _META_CACHE_LOCK:
+        _META_CACHE[video_id] = (fetched_at, metadata)
+        _META_CACHE.move_to_end(video_id)
+        
+        expire_before = time.time() - META_CACHE_TTL
+        for key in [key for key, (ts, _) in _META_CACHE.items() if ts < expire_before]:
+            del _META_CACHE[key]
+        while len(_META_CACHE) > META_CACHE_MAX_ENTRIES:
+            _META_CACHE.popitem(last=False)
+
+
+def _is_complete_metadata(metadata: dict) -> bool:
+    """Check that metadata has everything needed to cut a segment"""
+    stream = metadata.get('stream') or {}
+    return bool(metadata.get('title') and metadata.get('duration') and stream.get('ext'))
+
+
+def _get_ydl() -> yt_dlp.YoutubeDL:
+    """
+    Return this thread's shared YoutubeDL instance, creating it on first use.
+    
+    Returns:
+        yt_dlp.YoutubeDL: Instance configured with YDL_OPTS
+    """
+    ydl = getattr(_YDL_LOCAL, 'ydl', None)
+    if ydl is None:
+        ydl = _YDL_LOCAL.ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+    return ydl
+
+
+@functools.lru_cache(maxsize=None)
+def _codec_args(container: str, vcodec: Optional[str], acodec: Optional[str]) -> tuple:
+    """
+    Choose FFmpeg codec arguments for a source codec pair and output container.
+    
+    Stream copy is used whenever the codecs fit the container; only audio is
+    re-encoded when just the audio codec is incompatible with MP4, and a full
+    re-encode is reserved for video codecs MP4 cannot hold.
+    
+    Args:
+        container (str): Output file extension, e.g. 'mp4'
+        vcodec (str or None): Source video codec family, e.g. 'avc1'
+        acodec (str or None): Source audio codec family, e.g. 'mp4a'
+        
+    Returns:
+        tuple: FFmpeg codec arguments
+    """
+    # Unknown codecs (e.g. piped streams, which request an MP4 format) or
+    # non-MP4 outputs: copy as-is
+    if container != 'mp4' or not vcodec or not acodec:
+        return STREAM_COPY_ARGS
+    if vcodec not in MP4_VIDEO_CODECS:
+        return REENCODE_ARGS
+    if acodec not in MP4_AUDIO_CODECS:
+        return AUDIO_REENCODE_ARGS
+    return STREAM_COPY_ARGS
+
+
+def _codec_family(codec: Optional[str]) -> Optional[str]:
+    """Reduce a codec string such as 'avc1.64001F' to its family ('avc1')"""
+    if not codec or codec == 'none':
+        return None
+    return codec.split('.')[0].lower()
+
+
+def _is_http_format(fmt: dict) -> bool:
+    """Whether FFmpeg can read a format with plain HTTP(S) range requests"""
+    # 'protocol' is only filled in when yt-dlp processes the info, so derive it
+    return bool(fmt.get('url')) and yt_dlp.utils.determine_protocol(fmt) in ('http', 'https')
+
+
+def _format_headers(ydl: yt_dlp.YoutubeDL, fmt: dict, info: dict) -> dict:
+    """
+    Build the HTTP headers yt-dlp would send when downloading a format.
+    
+    yt-dlp only attaches these to formats when it processes the info, which
+    extract_info(process=False) skips.
+    
+    Args:
+        ydl (YoutubeDL): Instance the info was extracted with
+        fmt (dict): Selected format
+        info (dict): Unprocessed video info the format belongs to
+        
+    Returns:
+        dict: Header names and values
+    """
+    try:
+        return dict(ydl._calc_headers(ChainMap(fmt, info)))
+    except (AttributeError, TypeError):
+        # Private API; fall back to the configured headers plus the format's own
+        return {**(ydl.params.get('http_headers') or {}), **(fmt.get('http_headers') or {})}
+
+
+def canonical_video_url(video_id: str) -> str:
+    """
+    Build the plain watch URL for a video ID.
+    
+    Args:
+        video_id (str): YouTube video ID
+        
+    Returns:
+        str: URL that yt-dlp always handles with its single-video extractor
+    """
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Extract the canonical YouTube video ID from a URL.
+    
+    Args:
+        url (str): YouTube video URL
+        
+    Returns:
+        str or None: The 11 character video ID, or None if it cannot be found
+    """
+    match = _VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
 
 class YouTubeDownloaderError(Exception):
     """Base exception class for YouTubeSegmentDownloader"""
@@ -25,34 +252,105 @@ class FFmpegError(YouTubeDownloaderError):
     """Raised when FFmpeg encounters an error"""
     pass
 
+class _JobLoggerAdapter(logging.LoggerAdapter):
+    """Prefixes log messages with the ID of the job being processed, if any"""
+    def process(self, msg, kwargs):
+        job_id = _JOB_ID.get()
+        return (f"[{job_id}] {msg}" if job_id else msg), kwargs
+
+async def _collect_lines(stream: asyncio.StreamReader, lines: deque):
+    """Append decoded, non-empty lines from a stream until EOF"""
+    async for raw_line in stream:
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if line:
+            lines.append(line)
+
+def parse_timestamp(time_str: str) -> int:
+    """
+    Convert time string (HH:MM:SS or MM:SS or SS) to seconds.
+    
+    Args:
+        time_str (str): Time in HH:MM:SS, MM:SS, or SS format
+        
+    Returns:
+        int: Total seconds
+        
+    Raises:
+        InvalidTimestampError: If time format is invalid
+    """
+    # Handle empty or invalid input
+    if not time_str or not isinstance(time_str, str):
+        raise InvalidTimestampError("Timestamp must be a non-empty string")
+    
+    parts = time_str.split(':')
+    multipliers = _TIME_MULTIPLIERS.get(len(parts))
+    if multipliers is None:
+        raise InvalidTimestampError("Invalid time format")
+    
+    try:
+        return sum(int(part) * multiplier for part, multiplier in zip(parts, multipliers))
+    except ValueError:
+        raise InvalidTimestampError("Invalid time format. Use HH:MM:SS, MM:SS, or SS")
+
 class YouTubeSegmentDownloader:
-    def __init__(self, output_dir: str = "downloads"):
+    # FFmpeg availability and logging configuration are process-wide, so they
+    # are set up by the first instance and shared by the rest
+    _ffmpeg_checked = False
+    _logging_configured = False
+
+    def __init__(self, output_dir: str = "downloads", cache_dir: Optional[str] = None):
         """
         Initialize the downloader with an output directory.
         
         Args:
             output_dir (str): Directory where videos will be saved
+            cache_dir (str, optional): Directory where video metadata is persisted
+                so the cache survives restarts
         """
         self.output_dir = output_dir
+        self.cache_dir = cache_dir
         self._setup_logging()
         
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
             
         # Verify FFmpeg installation
-        self._check_ffmpeg()
+        if not type(self)._ffmpeg_checked:
+            self._check_ffmpeg()
+            type(self)._ffmpeg_checked = True
 
     def _setup_logging(self):
-        """Configure logging for the application"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('youtube_downloader.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        """
+        Configure logging for the application.
+        
+        Records are handed to a queue and written to the log file and console by
+        a single background listener thread, so logging never blocks a job on
+        file I/O or on a handler lock shared with other jobs.
+        """
+        cls = type(self)
+        if not cls._logging_configured:
+            root = logging.getLogger()
+            # Like basicConfig, leave logging alone if the application configured it
+            if not root.handlers:
+                formatter = logging.Formatter(LOG_FORMAT)
+                handlers = [logging.FileHandler(LOG_FILE), logging.StreamHandler()]
+                for handler in handlers:
+                    handler.setFormatter(formatter)
+                
+                log_queue = queue.SimpleQueue()
+                listener = logging.handlers.QueueListener(
+                    log_queue, *handlers, respect_handler_level=True
+                )
+                listener.start()
+                atexit.register(listener.stop)
+                
+                root.addHandler(logging.handlers.QueueHandler(log_queue))
+                root.setLevel(logging.INFO)
+            cls._logging_configured = True
+        self.logger = _JobLoggerAdapter(logging.getLogger(__name__), {})
 
     def _check_ffmpeg(self):
         """Verify FFmpeg is installed and accessible"""
@@ -76,26 +374,7 @@ class YouTubeSegmentDownloader:
         Raises:
             InvalidTimestampError: If time format is invalid
         """
-        try:
-            # Handle empty or invalid input
-            if not time_str or not isinstance(time_str, str):
-                raise InvalidTimestampError("Timestamp must be a non-empty string")
-
-            time_parts = list(map(int, time_str.split(':')))
-            
-            if len(time_parts) == 3:
-                return time_parts[0] * 3600 + time_parts[1] * 60 + time_parts[2]
-            elif len(time_parts) == 2:
-                return time_parts[0] * 60 + time_parts[1]
-            elif len(time_parts) == 1:
-                return time_parts[0]
-            else:
-                raise InvalidTimestampError("Invalid time format")
-                
-        except ValueError:
-            raise InvalidTimestampError("Invalid time format. Use HH:MM:SS, MM:SS, or SS")
-        except Exception as e:
-            raise InvalidTimestampError(f"Error parsing timestamp: {str(e)}")
+        return parse_timestamp(time_str)
 
     def _validate_timestamps(self, start_seconds: int, end_seconds: int, duration: float):
         """
@@ -120,16 +399,398 @@ class YouTubeSegmentDownloader:
                 f"End time ({end_seconds}s) exceeds video duration ({duration}s)"
             )
 
-    def download_segment(self, url: str, start_time: str, end_time: str, 
-                        output_filename: Optional[str] = None) -> str:
+    def _select_stream(self, info: dict) -> dict:
         """
-        Download a segment of a YouTube video.
+        Pick the best progressive (video + audio) stream from extracted video info.
+        
+        Args:
+            info (dict): Unprocessed info dict returned by yt-dlp's extract_info
+            
+        Returns:
+            dict: Format dict with a direct media 'url', or with 'url' set to None
+                when the video has to be piped through yt-dlp instead
+        """
+        progressive = [
+            f for f in info.get('formats') or []
+            if f.get('vcodec') != 'none' and f.get('acodec') != 'none' and _is_http_format(f)
+        ]
+        if progressive:
+            # Formats are not sorted when extract_info skips processing
+            return max(progressive, key=lambda f: (f.get('height') or 0, f.get('tbr') or 0))
+        # Only treat the info itself as a stream if it describes media, not a
+        # redirect to a web page
+        has_media = _codec_family(info.get('vcodec')) or _codec_family(info.get('acodec'))
+        if has_media and _is_http_format(info):
+            return info
+        return {'url': None, 'ext': PIPE_FORMAT_EXT}
+
+    def _fetch_video_metadata(self, url: str) -> dict:
+        """
+        Extract the metadata needed to cut a segment from YouTube.
+        
+        Args:
+            url (str): YouTube video URL
+            
+        Returns:
+            dict: Video title, duration and the selected stream
+            
+        Raises:
+            VideoUnavailableError: If video cannot be accessed or its metadata
+                is incomplete
+        """
+        self.logger.info(f"Extracting information from: {url}")
+        try:
+            ydl = _get_ydl()
+            info = ydl.extract_info(url, download=False, process=False)
+            # Without processing, yt-dlp does not follow redirect results
+            for _ in range(MAX_URL_REDIRECTS):
+                if not info or info.get('_type') not in ('url', 'url_transparent'):
+                    break
+                info = ydl.extract_info(info['url'], download=False, process=False)
+        except yt_dlp.utils.DownloadError as e:
+            raise VideoUnavailableError(f"Failed to access video: {str(e)}")
+        
+        if not info:
+            raise VideoUnavailableError("Could not retrieve video information")
+        
+        stream = self._select_stream(info)
+        metadata = {
+            'title': info.get('title'),
+            'duration': info.get('duration'),
+            'stream': {
+                'url': stream.get('url'),
+                'ext': stream.get('ext') or info.get('ext'),
+                'vcodec': stream.get('vcodec'),
+                'acodec': stream.get('acodec'),
+                'http_headers': _format_headers(ydl, stream, info) if stream.get('url') else {},
+            },
+        }
+        if not _is_complete_metadata(metadata):
+            raise VideoUnavailableError("Missing video metadata")
+        return metadata
+
+    def _get_video_metadata(self, url: str, video_id: Optional[str] = None) -> dict:
+        """
+        Return video metadata, served from the in-process or on-disk cache when fresh.
+        
+        Args:
+            url (str): YouTube video URL
+            video_id (str, optional): Video ID if the caller already extracted it
+            
+        Returns:
+            dict: Video title, duration and the selected stream
+            
+        Raises:
+            VideoUnavailableError: If video cannot be accessed
+        """
+        video_id = video_id or extract_video_id(url)
+        if not video_id:
+            return self._fetch_video_metadata(url)
+        
+        now = time.time()
+        cached = _meta_cache_get(video_id, now)
+        if cached:
+            self.logger.info(f"Using cached metadata for video: {video_id}")
+            return cached
+        
+        cache_path = os.path.join(self.cache_dir, f"{video_id}.json") if self.cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as f:
+                    entry = json.load(f)
+                if (now - entry['fetched_at'] < META_CACHE_TTL
+                        and _is_complete_metadata(entry['metadata'])):
+                    _meta_cache_put(video_id, entry['fetched_at'], entry['metadata'])
+                    self.logger.info(f"Using cached metadata for video: {video_id}")
+                    return entry['metadata']
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                self.logger.warning(f"Ignoring unreadable metadata cache file: {str(e)}")
+        
+        # Raises before anything is cached if the metadata is incomplete
+        metadata = self._fetch_video_metadata(url)
+        _meta_cache_put(video_id, now, metadata)
+        
+        if cache_path:
+            try:
+                with open(cache_path, "w") as f:
+                    json.dump({'fetched_at': now, 'metadata': metadata}, f)
+            except OSError as e:
+                self.logger.warning(f"Could not persist video metadata: {str(e)}")
+        
+        return metadata
+
+    def _build_ffmpeg_command(self, stream: dict, start_seconds: int, end_seconds: int,
+                              output_path: str, codec_args: tuple) -> list:
+        """
+        Build the FFmpeg command that cuts a segment from a remote stream.
+        
+        Streams without a direct URL are read from stdin (see _build_source_command).
+        
+        Seeking before -i jumps to the start via HTTP range requests, so the work
+        done is independent of where the segment sits in the video. With video
+        stream copy the cut starts at the keyframe at or before the start time.
+        When video is re-encoded the input seek lands SEEK_PREROLL seconds early
+        and an output seek trims the pre-roll for a frame-accurate cut.
+        
+        Args:
+            stream (dict): Selected stream with 'url' (None to read stdin) and
+                optional 'http_headers'
+            start_seconds (int): Start time in seconds
+            end_seconds (int): End time in seconds
+            output_path (str): Path of the output file
+            codec_args (tuple): Codec arguments, e.g. STREAM_COPY_ARGS
+            
+        Returns:
+            list: FFmpeg command line
+        """
+        command = [
+            'ffmpeg',
+            '-nostats',
+            '-loglevel', 'error',
+            '-progress', 'pipe:2',
+            '-threads', str(FFMPEG_THREADS),
+            '-filter_threads', str(FFMPEG_THREADS),
+            '-filter_complex_threads', str(FFMPEG_THREADS),
+        ]
+        if stream['url']:
+            command += [
+                '-reconnect', '1',
+                '-reconnect_streamed', '1',
+                '-reconnect_delay_max', '5',
+            ]
+            headers = stream.get('http_headers')
+            if headers:
+                command += ['-headers', ''.join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        if codec_args == REENCODE_ARGS:
+            seek_seconds = max(0, start_seconds - SEEK_PREROLL)
+            command += [
+                '-ss', str(seek_seconds),
+                '-i', stream['url'] or 'pipe:0',
+                '-ss', str(start_seconds - seek_seconds),
+            ]
+        else:
+            command += [
+                '-ss', str(start_seconds),
+                '-i', stream['url'] or 'pipe:0',
+            ]
+        command += [
+            '-t', str(end_seconds - start_seconds),
+            *codec_args,
+            '-avoid_negative_ts', 'make_zero',
+        ]
+        # movflags is an MP4/MOV muxer option; other muxers reject it
+        if output_path.lower().endswith(('.mp4', '.mov', '.m4v')):
+            command += ['-movflags', '+faststart']
+        command += ['-y', output_path]
+        return command
+
+    def _build_source_command(self, url: str) -> list:
+        """
+        Build the yt-dlp command that writes the video to stdout for FFmpeg.
+        
+        Args:
+            url (str): YouTube video URL
+            
+        Returns:
+            list: yt-dlp command line
+        """
+        return [
+            sys.executable, '-m', 'yt_dlp',
+            '--quiet',
+            '--no-warnings',
+            '--no-playlist',
+            '-f', PIPE_FORMAT,
+            '-o', '-',
+            url
+        ]
+
+    async def _run_ffmpeg(self, command: list, duration: float,
+                          progress_callback: Optional[ProgressCallback] = None,
+                          source_command: Optional[list] = None):
+        """
+        Run FFmpeg, streaming its stderr line by line instead of buffering it.
+        
+        FFmpeg must be invoked with '-progress pipe:2' so progress reports arrive
+        on stderr alongside error output.
+        
+        Args:
+            command (list): FFmpeg command line
+            duration (float): Expected output duration in seconds
+            progress_callback (callable, optional): Called with the completed
+                fraction (0.0 - 1.0) as FFmpeg reports progress
+            source_command (list, optional): Command whose stdout is piped
+                straight into FFmpeg's stdin
+            
+        Returns:
+            int or None: Number of video frames written to the output, or None
+                if FFmpeg did not report it
+            
+        Raises:
+            FFmpegError: If FFmpeg exits with a non-zero status; includes the
+                source's last stderr lines when it reported any
+        """
+        source = None
+        collector = None
+        source_errors = deque(maxlen=FFMPEG_ERROR_LINES)
+        stdin = asyncio.subprocess.DEVNULL
+        if source_command:
+            # Connect the processes with an OS pipe so the bytes never pass
+            # through Python or touch the disk
+            stdin, write_fd = os.pipe()
+            try:
+                source = await asyncio.create_subprocess_exec(
+                    *source_command,
+                    stdout=write_fd,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except BaseException:
+                os.close(stdin)
+                raise
+            finally:
+                os.close(write_fd)
+            # Keep yt-dlp's last error lines; FFmpeg only sees empty input
+            collector = asyncio.create_task(_collect_lines(source.stderr, source_errors))
+        
+        error = None
+        try:
+            frames = await self._stream_ffmpeg(command, duration, progress_callback, stdin)
+        except FFmpegError as e:
+            error = e
+        finally:
+            if source_command:
+                os.close(stdin)
+            if source:
+                # FFmpeg stops reading once the segment is complete
+                if source.returncode is None:
+                    source.kill()
+                await source.wait()
+                try:
+                    # Bounded in case a yt-dlp child process still holds stderr
+                    await asyncio.wait_for(collector, SOURCE_STDERR_TIMEOUT)
+                except asyncio.TimeoutError:
+                    pass
+        
+        if error is None:
+            return frames
+        if source_errors:
+            details = "\n".join(source_errors)
+            raise FFmpegError(f"{error}\nyt-dlp error: {details}") from error
+        raise error
+
+    async def _stream_ffmpeg(self, command: list, duration: float,
+                             progress_callback: Optional[ProgressCallback], stdin):
+        """
+        Run FFmpeg and consume its stderr, reporting progress and collecting errors.
+        
+        Args:
+            command (list): FFmpeg command line
+            duration (float): Expected output duration in seconds
+            progress_callback (callable, optional): Progress callback
+            stdin: File descriptor or asyncio.subprocess constant for FFmpeg's stdin
+            
+        Returns:
+            int or None: Number of video frames written, as reported by
+                '-progress'; None if no frame count was reported, which FFmpeg
+                6.1+ does for stream-copied video
+            
+        Raises:
+            FFmpegError: If FFmpeg exits with a non-zero status
+        """
+        errors = deque(maxlen=FFMPEG_ERROR_LINES)
+        frames = None
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=stdin,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        try:
+            async for raw_line in process.stderr:
+                line = raw_line.decode('utf-8', errors='replace').rstrip()
+                key, sep, value = line.partition('=')
+                if sep and key in ('out_time_us', 'out_time_ms'):
+                    # Both keys are reported in microseconds
+                    if progress_callback and value.isdigit() and duration > 0:
+                        result = progress_callback(min(1.0, int(value) / 1_000_000 / duration))
+                        if inspect.isawaitable(result):
+                            await result
+                elif sep and key == 'frame':
+                    # Only reported for video that FFmpeg encodes or, before 6.1, copies
+                    if value.isdigit():
+                        frames = int(value)
+                elif sep and key.isidentifier():
+                    # Remaining progress fields (speed=, progress=, ...)
+                    continue
+                elif line:
+                    self.logger.debug(line)
+                    errors.append(line)
+            
+            returncode = await process.wait()
+        finally:
+            # Cancelled, or the progress callback raised: do not leave FFmpeg
+            # blocked on a stderr pipe nobody reads
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        
+        if returncode != 0:
+            details = "\n".join(errors)
+            raise FFmpegError(f"FFmpeg error: {details}")
+        return frames
+
+    async def _probe_video_stream(self, path: str) -> Optional[bool]:
+        """
+        Check whether a media file contains a video stream.
+        
+        Args:
+            path (str): Media file to inspect
+            
+        Returns:
+            bool or None: Whether the file has a video stream, or None if
+                ffprobe is unavailable or cannot read the file
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffprobe', '-v', 'error',
+                '-select_streams', 'v',
+                '-show_entries', 'stream=index',
+                '-of', 'csv=p=0',
+                path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            return None
+        stdout, _ = await process.communicate()
+        if process.returncode != 0:
+            return None
+        return bool(stdout.strip())
+
+    async def download_segment_async(self, url: str, start_time: str, end_time: str,
+                                     output_filename: Optional[str] = None,
+                                     progress_callback: Optional[ProgressCallback] = None,
+                                     job_id: Optional[str] = None,
+                                     video_id: Optional[str] = None) -> str:
+        """
+        Download a segment of a YouTube video without blocking the event loop.
+        
+        Only the requested range is fetched: FFmpeg reads the direct media URL
+        and seeks with HTTP range requests instead of downloading the full video.
+        Metadata extraction runs in the default executor and FFmpeg runs as an
+        asyncio subprocess, so one event loop can oversee many downloads.
         
         Args:
             url (str): YouTube video URL
             start_time (str): Start time in HH:MM:SS, MM:SS, or SS format
             end_time (str): End time in HH:MM:SS, MM:SS, or SS format
             output_filename (str, optional): Custom output filename
+            progress_callback (callable, optional): Called with the completed
+                fraction (0.0 - 1.0) while the segment is being created; may be
+                a coroutine function
+            job_id (str, optional): Unique job ID used as the default filename stem
+                and to tag log messages
+            video_id (str, optional): Video ID if the caller already extracted it
             
         Returns:
             str: Path to the downloaded video segment
@@ -141,72 +802,70 @@ class YouTubeSegmentDownloader:
             FFmpegError: If FFmpeg encounters an error
             YouTubeDownloaderError: For other download-related errors
         """
-        full_video_path = None
-        
+        job_id_token = _JOB_ID.set(job_id)
         try:
             # Convert time strings to seconds
             start_seconds = self._time_to_seconds(start_time)
             end_seconds = self._time_to_seconds(end_time)
             
-            # Configure yt-dlp options
-            ydl_opts = {
-                'format': 'best',
-                'quiet': True,
-                'no_warnings': True,
-                'outtmpl': os.path.join(self.output_dir, '%(title)s.%(ext)s'),
-            }
+            # Extract from the plain watch URL; playlist and share parameters
+            # would route yt-dlp to extractors that return redirects
+            video_id = video_id or extract_video_id(url)
+            if video_id:
+                url = canonical_video_url(video_id)
             
-            # Get video information
-            self.logger.info(f"Extracting information from: {url}")
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    if not info:
-                        raise VideoUnavailableError("Could not retrieve video information")
-                    
-                    video_title = info.get('title')
-                    video_ext = info.get('ext')
-                    duration = info.get('duration')
-                    
-                    if not all([video_title, video_ext, duration]):
-                        raise VideoUnavailableError("Missing video metadata")
-                    
-                    # Validate timestamps against video duration
-                    self._validate_timestamps(start_seconds, end_seconds, duration)
-                    
-                    full_video_path = os.path.join(self.output_dir, f"{video_title}.{video_ext}")
-                    
-                    # Download the full video
-                    self.logger.info("Downloading video...")
-                    ydl.download([url])
-                    
-            except yt_dlp.utils.DownloadError as e:
-                raise VideoUnavailableError(f"Failed to access video: {str(e)}")
-            
-            # Generate output filename if not provided
+            # Get video information; to_thread carries the job ID context along
+            metadata = await asyncio.to_thread(self._get_video_metadata, url, video_id)
+            video_title = metadata['title']
+            duration = metadata['duration']
+            stream = metadata['stream']
+            video_ext = stream['ext']
+            
+            if not all([video_title, video_ext, duration]):
+                raise VideoUnavailableError("Missing video metadata")
+            
+            # Validate timestamps against video duration
+            self._validate_timestamps(start_seconds, end_seconds, duration)
+            
+            # Generate output filename if not provided; a unique stem keeps
+            # concurrent clips of the same video from overwriting each other
             if not output_filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"{video_title}_{timestamp}_segment.{video_ext}"
+                output_filename = f"{job_id or uuid.uuid4().hex}.{OUTPUT_EXT}"
             
             output_path = os.path.join(self.output_dir, output_filename)
             
-            # Cut the video using ffmpeg
+            # Cut the segment straight from the remote stream, or from yt-dlp's
+            # output when there is no direct URL FFmpeg can read
             self.logger.info("Creating segment with FFmpeg...")
-            command = [
-                'ffmpeg',
-                '-i', full_video_path,
-                '-ss', str(start_seconds),
-                '-t', str(end_seconds - start_seconds),
-                '-c', 'copy',
-                '-y',
-                output_path
-            ]
-            
-            try:
-                result = subprocess.run(command, capture_output=True, check=True, text=True)
-                self.logger.info("Segment created successfully")
-            except subprocess.CalledProcessError as e:
-                raise FFmpegError(f"FFmpeg error: {e.stderr}")
+            segment_duration = end_seconds - start_seconds
+            source_command = None if stream['url'] else self._build_source_command(url)
+            codec_args = _codec_args(
+                os.path.splitext(output_filename)[1].lstrip('.').lower(),
+                _codec_family(stream.get('vcodec')),
+                _codec_family(stream.get('acodec'))
+            )
+            command = self._build_ffmpeg_command(
+                stream, start_seconds, end_seconds, output_path, codec_args
+            )
+            frames = await self._run_ffmpeg(
+                command, segment_duration, progress_callback, source_command
+            )
+            # A stream copy that cannot start on a keyframe exits cleanly but
+            # writes no video. FFmpeg 6.1+ never reports frames for copied
+            # video, so only re-encode when a probe confirms it is missing.
+            has_video = bool(frames) or await self._probe_video_stream(output_path)
+            if has_video is False and codec_args is not REENCODE_ARGS:
+                self.logger.info("Stream copy produced no video, re-encoding segment...")
+                command = self._build_ffmpeg_command(
+                    stream, start_seconds, end_seconds, output_path, REENCODE_ARGS
+                )
+                frames = await self._run_ffmpeg(
+                    command, segment_duration, progress_callback, source_command
+                )
+                has_video = bool(frames) or await self._probe_video_stream(output_path)
+            if has_video is False:
+                raise FFmpegError("FFmpeg produced a segment without video")
+            self.logger.info("Segment created successfully")
             
             return output_path
             
@@ -215,12 +874,25 @@ class YouTubeSegmentDownloader:
         except Exception as e:
             raise YouTubeDownloaderError(f"Error downloading video segment: {str(e)}")
         finally:
-            # Clean up the full video
-            if full_video_path and os.path.exists(full_video_path):
-                try:
-                    os.remove(full_video_path)
-                except Exception as e:
-                    self.logger.error(f"Error cleaning up temporary file: {str(e)}")
+            _JOB_ID.reset(job_id_token)
+
+    def download_segment(self, url: str, start_time: str, end_time: str, 
+                        output_filename: Optional[str] = None,
+                        progress_callback: Optional[ProgressCallback] = None,
+                        job_id: Optional[str] = None,
+                        video_id: Optional[str] = None) -> str:
+        """
+        Download a segment of a YouTube video.
+        
+        Blocking version of download_segment_async for callers without an
+        event loop; takes the same arguments and raises the same errors.
+        
+        Returns:
+            str: Path to the downloaded video segment
+        """
+        return asyncio.run(self.download_segment_async(
+            url, start_time, end_time, output_filename, progress_callback, job_id, video_id
+        ))
 
     def __call__(self, url: str, start_time: str, end_time: str, 
                  output_filename: Optional[str] = None) -> str:
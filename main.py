@@ -1,19 +1,43 @@
 # main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, PrivateAttr, field_validator, model_validator
 import os
-from typing import Optional
+import asyncio
+import logging
+from typing import Dict, Optional
 from datetime import datetime
 import uuid
+import hashlib
 import json
+import shutil
+import time
+import sqlite3
+import threading
 from pathlib import Path
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
 
 # Import our YouTube downloader
-from core import YouTubeSegmentDownloader, InvalidTimestampError, TimestampRangeError, VideoUnavailableError, FFmpegError, YouTubeDownloaderError;
+from core import YouTubeSegmentDownloader, extract_video_id, parse_timestamp, InvalidTimestampError, TimestampRangeError, VideoUnavailableError, FFmpegError, YouTubeDownloaderError;
 
-app = FastAPI(title="YouTube Clipper API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background clip evictor for the lifetime of the app"""
+    evictor = asyncio.create_task(run_clip_evictor())
+    try:
+        yield
+    finally:
+        evictor.cancel()
+        # Cancel running clips so their FFmpeg and yt-dlp processes are killed
+        tasks = list(_TASKS)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(evictor, *tasks, return_exceptions=True)
+
+app = FastAPI(title="YouTube Clipper API", lifespan=lifespan)
+logger = logging.getLogger(__name__)
 
 # Configure CORS
 app.add_middleware(
@@ -24,19 +48,101 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create downloads directory
-DOWNLOAD_DIR = Path("downloads")
-DOWNLOAD_DIR.mkdir(exist_ok=True)
+# Evict clips older than CLIP_MAX_AGE seconds, and oldest first while the
+# directory holds more than DOWNLOAD_DIR_MAX_BYTES
+CLIP_MAX_AGE = 30 * 60
+DOWNLOAD_DIR_MAX_BYTES = 2 * 1024 ** 3
+EVICTION_INTERVAL = 60
+
+# Refuse new jobs when the download filesystem has less free space than this
+MIN_FREE_BYTES = 256 * 1024 ** 2
+
+def tmpfs_has_room(path: Path) -> bool:
+    """Whether a tmpfs mount can hold a full download directory"""
+    try:
+        return shutil.disk_usage(path).free >= DOWNLOAD_DIR_MAX_BYTES + MIN_FREE_BYTES
+    except OSError:
+        return False
+
+# Create downloads directory. Clips are written once and read back soon after,
+# so keep them on RAM-backed tmpfs when it is large enough; Docker's default
+# 64 MiB /dev/shm is not (override the parent directory with YTCLIP_DIR).
+# Clips live in a subdirectory of their own because the evictor deletes
+# everything in it.
+TMPFS_DIR = Path("/dev/shm")
+LEGACY_DOWNLOAD_DIR = Path("downloads")
+DOWNLOAD_DIR = Path(
+    os.environ.get("YTCLIP_DIR")
+    or (TMPFS_DIR if tmpfs_has_room(TMPFS_DIR) else LEGACY_DOWNLOAD_DIR)
+) / "yt_clips"
+DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Store job statuses
 JOBS_DIR = Path("jobs")
 JOBS_DIR.mkdir(exist_ok=True)
+JOBS_DB = JOBS_DIR / "jobs.db"
+
+# Cache extracted video metadata across jobs and restarts
+META_DIR = JOBS_DIR / "meta"
+
+# Clips run as asyncio tasks; cap how many FFmpeg processes run at once
+MAX_CONCURRENT_FFMPEG = max(1, (os.cpu_count() or 2) // 2)
+FFMPEG_SLOTS = asyncio.Semaphore(MAX_CONCURRENT_FFMPEG)
+
+class ClipFileResponse(FileResponse):
+    """FileResponse that streams clips in 1 MiB chunks instead of 64 KiB"""
+    chunk_size = 1024 * 1024
+
+# Only clips from these hosts are accepted
+ALLOWED_HOSTS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be"})
 
 class ClipRequest(BaseModel):
-    url: HttpUrl
+    url: str
     start_time: str
     end_time: str
     filename: Optional[str] = None
+    _video_id: Optional[str] = PrivateAttr(default=None)
+    _start_seconds: int = PrivateAttr(default=0)
+    _end_seconds: int = PrivateAttr(default=0)
+
+    @field_validator("url")
+    @classmethod
+    def check_youtube_url(cls, url: str) -> str:
+        """Accept only http(s) URLs on a YouTube host"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.hostname not in ALLOWED_HOSTS:
+            raise ValueError("URL must be a youtube.com or youtu.be video link")
+        return url
+
+    @model_validator(mode="after")
+    def attach_video_id(self) -> "ClipRequest":
+        """Extract the video ID once so the downloader does not reparse the URL"""
+        self._video_id = extract_video_id(self.url)
+        if not self._video_id:
+            raise ValueError("URL does not contain a YouTube video ID")
+        return self
+
+    @model_validator(mode="after")
+    def parse_times(self) -> "ClipRequest":
+        """Parse the time range so equivalent spellings identify the same clip"""
+        try:
+            self._start_seconds = parse_timestamp(self.start_time)
+            self._end_seconds = parse_timestamp(self.end_time)
+        except InvalidTimestampError as e:
+            raise ValueError(str(e))
+        return self
+
+    @property
+    def video_id(self) -> str:
+        return self._video_id
+
+    @property
+    def start_seconds(self) -> int:
+        return self._start_seconds
+
+    @property
+    def end_seconds(self) -> int:
+        return self._end_seconds
 
 class JobStatus(BaseModel):
     job_id: str
@@ -46,37 +152,177 @@ class JobStatus(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
 
-def save_job_status(job_status: JobStatus):
-    """Save job status to file"""
-    with open(JOBS_DIR / f"{job_status.job_id}.json", "w") as f:
-        json.dump(job_status.dict(), f, default=str)
+# Memory-map the job database so status reads are served from the page cache
+# without a read syscall per page
+JOBS_DB_MMAP_SIZE = 64 * 1024 * 1024
 
-def process_video_clip(job_id: str, clip_request: ClipRequest):
-    """Background task to process video clip"""
-    job_status = JobStatus(
-        job_id=job_id,
-        status="processing",
-        created_at=datetime.now()
+# One job database connection per process, shared by that process's threads
+_db: Optional[sqlite3.Connection] = None
+_db_pid: Optional[int] = None
+_db_lock = threading.Lock()
+
+def get_db() -> sqlite3.Connection:
+    """Return this process's job database connection. Call with _db_lock held."""
+    global _db, _db_pid
+    # Connections must not be reused across a fork
+    if _db is None or _db_pid != os.getpid():
+        _db = sqlite3.connect(JOBS_DB, isolation_level=None, check_same_thread=False)
+        _db.row_factory = sqlite3.Row
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL")
+        _db.execute(f"PRAGMA mmap_size={JOBS_DB_MMAP_SIZE}")
+        _db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                message TEXT,
+                download_url TEXT,
+                created_at REAL NOT NULL,
+                completed_at REAL,
+                clip_key TEXT
+            )"""
+        )
+        _db.execute("CREATE INDEX IF NOT EXISTS jobs_clip_key ON jobs (clip_key, status)")
+        import_legacy_jobs(_db)
+        _db_pid = os.getpid()
+    return _db
+
+JOB_COLUMNS = "job_id, status, message, download_url, created_at, completed_at"
+
+def import_legacy_jobs(db: sqlite3.Connection):
+    """Copy jobs saved as JSON files before the jobs database existed into it"""
+    for path in JOBS_DIR.glob("*.json"):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            completed_at = data.get("completed_at")
+            params = (
+                data["job_id"],
+                data["status"],
+                data.get("message"),
+                data.get("download_url"),
+                datetime.fromisoformat(data["created_at"]).timestamp(),
+                datetime.fromisoformat(completed_at).timestamp() if completed_at else None,
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Skipping unreadable job file {path.name}: {str(e)}")
+            continue
+        # Rows already in the database are newer than their JSON file
+        db.execute(
+            f"INSERT OR IGNORE INTO jobs ({JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            params
+        )
+
+def save_job_status(job_status: JobStatus, clip_key: Optional[str] = None):
+    """Save job status to the jobs database. clip_key is only recorded on first save."""
+    # Bind fields directly rather than copying the model through .dict()
+    params = (
+        job_status.job_id,
+        job_status.status,
+        job_status.message,
+        job_status.download_url,
+        job_status.created_at.timestamp(),
+        job_status.completed_at.timestamp() if job_status.completed_at else None,
+        clip_key,
     )
-    save_job_status(job_status)
+    with _db_lock:
+        get_db().execute(
+            f"""INSERT INTO jobs ({JOB_COLUMNS}, clip_key)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (job_id) DO UPDATE SET
+                   status = excluded.status,
+                   message = excluded.message,
+                   download_url = excluded.download_url,
+                   completed_at = excluded.completed_at""",
+            params
+        )
 
-    try:
-        downloader = YouTubeSegmentDownloader(output_dir=str(DOWNLOAD_DIR))
-        
-        # Generate filename if not provided
-        if not clip_request.filename:
-            clip_request.filename = f"clip_{job_id}.mp4"
-
-        output_path = downloader.download_segment(
-            url=str(clip_request.url),
-            start_time=clip_request.start_time,
-            end_time=clip_request.end_time,
-            output_filename=clip_request.filename
+def _row_to_job_status(row: Optional[sqlite3.Row]) -> Optional[JobStatus]:
+    """Convert a jobs table row to a JobStatus"""
+    if row is None:
+        return None
+    data = dict(row)
+    data["created_at"] = datetime.fromtimestamp(row["created_at"])
+    data["completed_at"] = datetime.fromtimestamp(row["completed_at"]) if row["completed_at"] else None
+    return JobStatus(**data)
+
+def load_job_status(job_id: str) -> Optional[JobStatus]:
+    """Load job status from the jobs database, or None if the job does not exist"""
+    with _db_lock:
+        row = get_db().execute(
+            f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    return _row_to_job_status(row)
+
+def find_completed_clip(clip_key: str) -> Optional[JobStatus]:
+    """Return the most recent completed job for a clip whose file still exists"""
+    with _db_lock:
+        row = get_db().execute(
+            f"""SELECT {JOB_COLUMNS} FROM jobs
+                WHERE clip_key = ? AND status = 'completed'
+                ORDER BY completed_at DESC LIMIT 1""",
+            (clip_key,)
+        ).fetchone()
+    job_status = _row_to_job_status(row)
+    if job_status and (DOWNLOAD_DIR / Path(job_status.download_url).name).exists():
+        return job_status
+    return None
+
+# Jobs currently queued or processing, by clip key, so identical requests
+# share one job instead of running the whole pipeline twice
+INFLIGHT: Dict[str, JobStatus] = {}
+
+# Keep references to running clip tasks so they are not garbage collected
+_TASKS = set()
+
+def get_clip_key(clip_request: ClipRequest) -> str:
+    """Identify a clip by its source video, time range and output filename"""
+    key = (f"{clip_request.video_id}|{clip_request.start_seconds}|"
+           f"{clip_request.end_seconds}|{clip_request.filename or ''}")
+    return hashlib.sha1(key.encode()).hexdigest()
+
+# Built once and reused across jobs
+_downloader: Optional[YouTubeSegmentDownloader] = None
+
+def get_downloader() -> YouTubeSegmentDownloader:
+    """Return the shared downloader, creating it on first use"""
+    global _downloader
+    if _downloader is None:
+        _downloader = YouTubeSegmentDownloader(
+            output_dir=str(DOWNLOAD_DIR),
+            cache_dir=str(META_DIR)
         )
+    return _downloader
+
+async def process_video_clip(job_status: JobStatus, clip_request: ClipRequest, clip_key: str):
+    """Background task to process video clip"""
+    try:
+        async with FFMPEG_SLOTS:
+            job_status.status = "processing"
+            await asyncio.to_thread(save_job_status, job_status)
+
+            downloader = get_downloader()
+
+            async def report_progress(fraction: float):
+                message = f"{int(fraction * 100)}% complete"
+                if message != job_status.message:
+                    job_status.message = message
+                    await asyncio.to_thread(save_job_status, job_status)
+
+            output_path = await downloader.download_segment_async(
+                url=clip_request.url,
+                start_time=clip_request.start_time,
+                end_time=clip_request.end_time,
+                output_filename=clip_request.filename,
+                progress_callback=report_progress,
+                job_id=job_status.job_id,
+                video_id=clip_request.video_id
+            )
 
         # Update job status
         job_status.status = "completed"
-        job_status.download_url = f"/download/{clip_request.filename}"
+        job_status.message = None
+        job_status.download_url = f"/download/{os.path.basename(output_path)}"
         job_status.completed_at = datetime.now()
 
     except (InvalidTimestampError, TimestampRangeError, VideoUnavailableError, 
@@ -90,46 +336,115 @@ def process_video_clip(job_id: str, clip_request: ClipRequest):
         job_status.message = f"Unexpected error: {str(e)}"
         job_status.completed_at = datetime.now()
 
+    except asyncio.CancelledError:
+        job_status.status = "failed"
+        job_status.message = "Server shut down before the clip was finished"
+        job_status.completed_at = datetime.now()
+        raise
+
     finally:
-        save_job_status(job_status)
+        # Record the outcome before releasing the clip so a new request for it
+        # finds either this job or its completed result
+        try:
+            await asyncio.to_thread(save_job_status, job_status)
+        finally:
+            INFLIGHT.pop(clip_key, None)
+
+def evict_clips():
+    """Delete expired clips, then the oldest ones while over the size cap"""
+    clips = []
+    for entry in os.scandir(DOWNLOAD_DIR):
+        if entry.is_file():
+            stat = entry.stat()
+            clips.append((stat.st_mtime, stat.st_size, entry.path))
+    clips.sort()
+
+    expire_before = time.time() - CLIP_MAX_AGE
+    total_size = sum(size for _, size, _ in clips)
+    for mtime, size, path in clips:
+        if mtime >= expire_before and total_size <= DOWNLOAD_DIR_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+        except FileNotFoundError:
+            pass
+
+async def run_clip_evictor():
+    """Periodically evict clips from the download directory"""
+    while True:
+        try:
+            await asyncio.to_thread(evict_clips)
+        except OSError as e:
+            logger.error(f"Error evicting clips: {str(e)}")
+        await asyncio.sleep(EVICTION_INTERVAL)
 
 @app.post("/api/clips", response_model=JobStatus)
-async def create_clip(
-    clip_request: ClipRequest,
-    background_tasks: BackgroundTasks
-):
+async def create_clip(clip_request: ClipRequest):
     """Create a new video clip"""
-    job_id = str(uuid.uuid4())
+    clip_key = get_clip_key(clip_request)
     
-    # Schedule the background task
-    background_tasks.add_task(process_video_clip, job_id, clip_request)
+    # Reuse a finished clip if it is still on disk. A user-chosen filename
+    # may since have been overwritten by a different clip, so only generated
+    # (job ID) names are trusted.
+    if not clip_request.filename:
+        completed = await asyncio.to_thread(find_completed_clip, clip_key)
+        if completed:
+            return completed
     
-    return JobStatus(
-        job_id=job_id,
+    job_status = JobStatus(
+        job_id=str(uuid.uuid4()),
         status="queued",
         created_at=datetime.now()
     )
+    
+    # Join an identical job that is already queued or processing
+    inflight = INFLIGHT.setdefault(clip_key, job_status)
+    if inflight is not job_status:
+        return await asyncio.to_thread(load_job_status, inflight.job_id) or inflight
+    
+    if shutil.disk_usage(DOWNLOAD_DIR).free < MIN_FREE_BYTES:
+        INFLIGHT.pop(clip_key, None)
+        raise HTTPException(status_code=503, detail="Not enough space for new clips, try again later")
+    
+    try:
+        await asyncio.to_thread(save_job_status, job_status, clip_key)
+    except Exception:
+        # Release the clip, or identical requests would join a job that never runs
+        INFLIGHT.pop(clip_key, None)
+        raise
+    
+    # The task updates its own copy so the response below stays "queued"
+    task = asyncio.create_task(process_video_clip(job_status.model_copy(), clip_request, clip_key))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
+    
+    return job_status
 
 @app.get("/api/clips/{job_id}", response_model=JobStatus)
 async def get_clip_status(job_id: str):
     """Get status of a clip job"""
-    try:
-        with open(JOBS_DIR / f"{job_id}.json", "r") as f:
-            return JobStatus(**json.load(f))
-    except FileNotFoundError:
+    job_status = await asyncio.to_thread(load_job_status, job_id)
+    if job_status is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    return job_status
 
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Download a processed clip"""
     file_path = DOWNLOAD_DIR / filename
     if not file_path.exists():
+        # Clips written before they moved to their own directory
+        file_path = LEGACY_DOWNLOAD_DIR / filename
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(
+    return ClipFileResponse(
         path=file_path,
         filename=filename,
-        media_type="video/mp4"
+        media_type="video/mp4",
+        headers={"Accept-Ranges": "bytes"}
     )
 
-# Run with: uvicorn main:app --reload
\ No newline at end of file
+# Run with: uvicorn main:app --reload
+# In production: uvicorn main:app --http httptools --loop uvloop
\ No newline at end of file